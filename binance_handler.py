@@ -1,16 +1,49 @@
+import json
 import logging
 import asyncio
+import time
 from typing import List, Dict, Optional
+import aiohttp
+import binance.streams
 from binance.async_client import AsyncClient
 from binance.streams import BinanceSocketManager
+import numpy as np
 import pandas as pd
 from config import (
     BINANCE_API_KEY, BINANCE_API_SECRET, BINANCE_FUTURES_BASE_URL_REST,
-    VOLUME_THRESHOLD_USD, KLINE_LIMIT, TIMEFRAME
+    VOLUME_THRESHOLD_USD, KLINE_LIMIT, TIMEFRAME,
+    EXCHANGE_INFO_CACHE_TTL, TICKER_CACHE_TTL
 )
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, websockets fall back to ujson or stdlib json
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
 logger = logging.getLogger(__name__)
 
+
+class _FastJsonModule:
+    """Stand-in for the json module used by binance.streams that decodes with a faster loads"""
+
+    def __init__(self, loads):
+        self.loads = loads
+
+    def __getattr__(self, name):
+        return getattr(json, name)
+
+
+# python-binance decodes every websocket frame with json.loads; orjson (or ujson) is a drop-in and much faster
+if orjson is not None:
+    binance.streams.json = _FastJsonModule(orjson.loads)
+elif ujson is not None:
+    binance.streams.json = _FastJsonModule(ujson.loads)
+
 class BinanceHandler:
     def __init__(self):
         """Initialize Binance handler with connection management"""
@@ -20,6 +53,7 @@ class BinanceHandler:
         self.conn_keys = {}
         self.monitored_symbols_details = {}
         self._connection_lock = asyncio.Lock()
+        self._response_cache = {}  # endpoint name -> (expires_at, response)
 
     async def initialize_client(self):
         """Initialize async client with proper error handling"""
@@ -27,10 +61,18 @@ class BinanceHandler:
             async with self._connection_lock:
                 if self.client is None:  # Double-check pattern
                     try:
+                        # Tuned pool: keep connections alive and cache DNS for the startup request burst
+                        connector = aiohttp.TCPConnector(
+                            limit=100,
+                            limit_per_host=50,
+                            ttl_dns_cache=300,
+                            keepalive_timeout=60
+                        )
                         self.client = await AsyncClient.create(
                             BINANCE_API_KEY, 
                             BINANCE_API_SECRET, 
-                            testnet=self.is_testnet
+                            testnet=self.is_testnet,
+                            session_params={'connector': connector}
                         )
                         self.bsm = BinanceSocketManager(self.client)
                         logger.info(f"Binance client initialized (testnet: {self.is_testnet})")
@@ -43,6 +85,27 @@ class BinanceHandler:
         if self.client is None:
             await self.initialize_client()
 
+    async def _cached_request(self, name: str, ttl: float, request):
+        """
+        Return a cached REST response, calling the API only once the TTL has expired
+        
+        Args:
+            name (str): Cache key for the endpoint
+            ttl (float): Time to live in seconds
+            request: Coroutine function performing the API call
+            
+        Returns:
+            The (possibly cached) API response
+        """
+        now = time.monotonic()
+        cached = self._response_cache.get(name)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        
+        response = await request()
+        self._response_cache[name] = (now + ttl, response)
+        return response
+
     async def get_tradable_futures_symbols(self, max_retries: int = 3) -> List[str]:
         """
         Get list of tradable USDT futures symbols with retry logic
@@ -57,7 +120,9 @@ class BinanceHandler:
         
         for attempt in range(max_retries):
             try:
-                exchange_info = await self.client.futures_exchange_info()
+                exchange_info = await self._cached_request(
+                    'futures_exchange_info', EXCHANGE_INFO_CACHE_TTL, self.client.futures_exchange_info
+                )
                 symbols = [
                     s['symbol'] for s in exchange_info['symbols']
                     if (s['quoteAsset'] == 'USDT' and 
@@ -98,25 +163,26 @@ class BinanceHandler:
         for attempt in range(max_retries):
             try:
                 # Get 24hr ticker statistics for all symbols
-                ticker_stats = await self.client.futures_ticker()
+                ticker_stats = await self._cached_request(
+                    'futures_ticker', TICKER_CACHE_TTL, self.client.futures_ticker
+                )
                 
-                # Create a dictionary for quick lookup
-                ticker_dict = {ticker['symbol']: ticker for ticker in ticker_stats}
+                # Build symbol -> 24h quote volume map once for O(1) lookups
+                volume_by_symbol = {ticker['symbol']: ticker.get('quoteVolume') for ticker in ticker_stats}
                 
                 for symbol in symbols:
-                    if symbol in ticker_dict:
-                        ticker = ticker_dict[symbol]
+                    if symbol in volume_by_symbol:
                         try:
                             # Calculate 24h volume in USD
-                            volume_usdt = float(ticker['quoteVolume'])
+                            volume_usdt = float(volume_by_symbol[symbol])
                             
                             if volume_usdt >= VOLUME_THRESHOLD_USD:
                                 filtered_symbols.append(symbol)
-                                logger.debug(f"{symbol}: ${volume_usdt:,.0f} volume (INCLUDED)")
+                                logger.debug("%s: $%.0f volume (INCLUDED)", symbol, volume_usdt)
                             else:
-                                logger.debug(f"{symbol}: ${volume_usdt:,.0f} volume (excluded)")
+                                logger.debug("%s: $%.0f volume (excluded)", symbol, volume_usdt)
                                 
-                        except (ValueError, KeyError) as e:
+                        except (TypeError, ValueError) as e:
                             logger.warning(f"Error processing volume for {symbol}: {e}")
                             continue
                     else:
@@ -145,6 +211,7 @@ class BinanceHandler:
             
         Returns:
             pd.DataFrame: DataFrame with historical kline data
+                (timestamp is the candle open time in epoch milliseconds)
         """
         await self.ensure_client()
         
@@ -161,25 +228,16 @@ class BinanceHandler:
                     logger.warning(f"No kline data received for {symbol}")
                     return pd.DataFrame()
 
-                # Convert to DataFrame
-                df = pd.DataFrame(klines, columns=[
-                    'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                    'close_time', 'quote_asset_volume', 'number_of_trades',
-                    'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-                ])
-                
-                # Convert data types
-                df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-                df['open'] = df['open'].astype(float)
-                df['high'] = df['high'].astype(float)
-                df['low'] = df['low'].astype(float)
-                df['close'] = df['close'].astype(float)
-                df['volume'] = df['volume'].astype(float)
-                
-                # Keep only needed columns
-                df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
+                # Convert to DataFrame, taking only the needed fields of each kline
+                # (open time + OHLCV); the other 6 fields are never allocated.
+                # OHLCV strings are parsed to float64 in a single NumPy pass, timestamps stay int64 ms
+                ohlcv = np.array([kline[1:6] for kline in klines], dtype=np.float64)
+                df = pd.DataFrame(ohlcv, columns=['open', 'high', 'low', 'close', 'volume'])
+                df.insert(0, 'timestamp', np.fromiter(
+                    (kline[0] for kline in klines), dtype=np.int64, count=len(klines)
+                ))
                 
-                logger.debug(f"Loaded {len(df)} historical klines for {symbol}")
+                logger.debug("Loaded %d historical klines for %s", len(df), symbol)
                 return df
                 
             except Exception as e:
@@ -207,7 +265,7 @@ class BinanceHandler:
             try:
                 oi_data = await self.client.futures_open_interest(symbol=symbol)
                 open_interest = float(oi_data['openInterest'])
-                logger.debug(f"Open interest for {symbol}: {open_interest}")
+                logger.debug("Open interest for %s: %s", symbol, open_interest)
                 return open_interest
                 
             except Exception as e:
@@ -231,12 +289,15 @@ class BinanceHandler:
         await self.ensure_client()
         
         try:
-            ticker_stats = await self.client.futures_ticker()
+            ticker_stats = await self._cached_request(
+                'futures_ticker', TICKER_CACHE_TTL, self.client.futures_ticker
+            )
             symbol_details = {}
+            symbols_set = set(symbols)
             
             for ticker in ticker_stats:
                 symbol = ticker['symbol']
-                if symbol in symbols:
+                if symbol in symbols_set:
                     symbol_details[symbol] = {
                         'price': float(ticker['lastPrice']),
                         'volume_24h': float(ticker['volume']),
@@ -259,4 +320,5 @@ class BinanceHandler:
             await self.client.close_connection()
             logger.info("Binance client connection closed")
             self.client = None
-            self.bsm = None
\ No newline at end of file
+            self.bsm = None
+            self._response_cache.clear()
\ No newline at end of file
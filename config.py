@@ -36,6 +36,12 @@ SYMBOLS_TO_MONITOR = []  # Leave empty to monitor all suitable symbols, or speci
 # Bot Configuration
 RECONNECT_DELAY = 5  # seconds
 MAX_RECONNECT_ATTEMPTS = 10
+INIT_CONCURRENCY = 20  # Max parallel REST requests while loading historical data
+EXCHANGE_INFO_CACHE_TTL = 3600  # seconds - futures_exchange_info changes rarely
+TICKER_CACHE_TTL = 60  # seconds - 24h ticker statistics
+OI_REFRESH_INTERVAL = 2  # seconds - how often symbols flagged by force orders get fresh open interest
+OI_MIN_FETCH_INTERVAL = 10  # seconds - minimum time between open interest requests for one symbol
+OI_REFRESH_BATCH = 20  # Max open interest requests per refresh cycle
 HEARTBEAT_INTERVAL = 300  # 5 minutes - send status updates
 COOLDOWN_BETWEEN_SIGNALS = 300  # 5 minutes - prevent spam
 
@@ -1,36 +1,35 @@
 import asyncio
 import logging
-import pandas as pd
-from collections import deque
-from datetime import datetime, timedelta
+import operator
+from datetime import datetime
 import signal
 import sys
-from binance.streams import BinanceSocketManager
-from binance.async_client import AsyncClient
+import time
+
+try:
+    import uvloop
+except ImportError:  # uvloop is optional (not available on Windows)
+    uvloop = None
 
 import config
 from telegram_bot_handler import TelegramBotHandler
 from binance_handler import BinanceHandler
 from strategy import Strategy
+from market_data import KlineRing, OpenInterestTable
 
 # Настройка системы логирования
 def setup_logging():
     """Настройка системы логирования"""
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     
-    handlers = []
-    
     # Всегда выводим в консоль
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(logging.Formatter(log_format))
-    handlers.append(console_handler)
+    handlers = [logging.StreamHandler()]
     
     # Если включено логирование в файл
     if config.LOG_TO_FILE:
-        file_handler = logging.FileHandler(config.LOG_FILE, encoding='utf-8')
-        file_handler.setFormatter(logging.Formatter(log_format))
-        handlers.append(file_handler)
+        handlers.append(logging.FileHandler(config.LOG_FILE, encoding='utf-8'))
     
+    # basicConfig сам назначает формат всем обработчикам
     logging.basicConfig(
         level=getattr(logging, config.LOG_LEVEL),
         format=log_format,
@@ -40,13 +39,32 @@ def setup_logging():
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Общий стрим ликвидаций по всем символам фьючерсов (вместо отдельного стрима на каждый символ)
+FORCE_ORDER_STREAM = "!forceOrder@arr"
+# Суффикс стримов свечей вычисляем один раз, а не на каждое сообщение
+KLINE_SUFFIX = f"@kline_{config.TIMEFRAME}"
+# Если за это время не пришло ни одного сообщения, соединение считается зависшим
+WEBSOCKET_INACTIVITY_TIMEOUT = 30.0
+# Буфер между чтением WebSocket и обработкой сообщений
+WEBSOCKET_QUEUE_SIZE = 10_000
+# Поля свечи, которые нужны боту: время открытия и OHLCV (одним вызовом на C вместо шести обращений к словарю)
+KLINE_FIELDS = operator.itemgetter('t', 'o', 'h', 'l', 'c', 'v')
+
 class CryptoScalpingBot:
     def __init__(self):
         """Инициализация бота с всеми необходимыми компонентами"""
         # Хранилища данных
         self.symbol_kline_data = {}  # Исторические данные свечей
-        self.symbol_open_interest_data = {}  # Данные открытого интереса
-        self.last_signal_time = {}  # Отслеживание времени последнего сигнала (для cooldown)
+        self.symbol_open_interest_data = OpenInterestTable([])  # Данные открытого интереса
+        self.last_signal_time = {}  # Время последнего сигнала по символу, time.monotonic (для cooldown)
+        self.active_symbols = frozenset()  # Символы, на которые оформлена подписка
+        self.stream_dispatch = {}  # Название стрима -> (символ, обработчик), заполняется при подписке
+        self._oi_dirty = set()  # Символы с force order событиями, ждущие обновления OI
+        self._oi_last_fetch = {}  # Символ -> время последнего запроса OI (time.monotonic)
+        self._message_queue = asyncio.Queue(maxsize=WEBSOCKET_QUEUE_SIZE)  # Принятые, но еще не обработанные сообщения
+        self._dropped_messages = 0
+        self._background_tasks = []  # Задачи, работающие все время жизни бота
+        self._last_msg_ts = 0.0  # Время последнего сообщения WebSocket (time.monotonic)
         
         # Компоненты бота
         self.telegram_bot = TelegramBotHandler()
@@ -56,10 +74,8 @@ class CryptoScalpingBot:
         # Состояние бота
         self.running = False
         self.reconnect_count = 0
-        self.last_heartbeat = datetime.now()
         
-        # WebSocket соединения
-        self.client = None
+        # WebSocket соединения (клиент общий с binance_handler)
         self.websocket_manager = None
         
         logger.info("Crypto Scalping Bot initialized")
@@ -75,129 +91,130 @@ class CryptoScalpingBot:
             f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
         )
         await self.telegram_bot.send_message(startup_msg)
-        logger.info("Startup message sent")
+        logger.info("Startup message queued")
 
     async def send_heartbeat(self):
-        """Отправляет периодические обновления статуса бота"""
-        current_time = datetime.now()
-        if (current_time - self.last_heartbeat).total_seconds() >= config.HEARTBEAT_INTERVAL:
-            active_symbols = len([s for s in self.symbol_kline_data.keys() 
-                                if s in self.symbol_kline_data and len(self.symbol_kline_data[s]) > 0])
-            
-            status_msg = (
-                f"💓 *Bot Status Update*\n\n"
-                f"Active symbols: {active_symbols}\n"
-                f"Reconnects: {self.reconnect_count}\n"
-                f"Uptime: {current_time.strftime('%H:%M:%S')}\n"
-                f"Environment: {config.ENVIRONMENT}\n"
-                f"Memory usage: {len(self.symbol_kline_data)} symbols tracked"
-            )
-            await self.telegram_bot.send_message(status_msg)
-            self.last_heartbeat = current_time
-            logger.debug("Heartbeat sent")
+        """Отправляет обновление статуса бота"""
+        active_symbols = sum(1 for ring in self.symbol_kline_data.values() if ring)
+        
+        status_msg = (
+            f"💓 *Bot Status Update*\n\n"
+            f"Active symbols: {active_symbols}\n"
+            f"Reconnects: {self.reconnect_count}\n"
+            f"Uptime: {datetime.now().strftime('%H:%M:%S')}\n"
+            f"Environment: {config.ENVIRONMENT}\n"
+            f"Memory usage: {len(self.symbol_kline_data)} symbols tracked"
+        )
+        self.telegram_bot.enqueue_message(status_msg)
+        logger.debug("Heartbeat sent")
+
+    async def _heartbeat_loop(self):
+        """Периодически отправляет статус; отдельная задача, а не проверка на каждое сообщение"""
+        while self.running:
+            await asyncio.sleep(config.HEARTBEAT_INTERVAL)
+            try:
+                await self.send_heartbeat()
+            except Exception as e:
+                logger.error(f"Error sending heartbeat: {e}")
 
     async def process_message(self, msg):
         """Обрабатывает сообщения из WebSocket"""
         try:
-            stream_name = msg.get('stream', '')
-            data = msg.get('data', {})
-            event_type = data.get('e')
+            stream_name = msg.get('stream')
 
-            if not event_type or not stream_name:
-                logger.debug("Received message without event type or stream name")
-                return
-
-            # Извлекаем символ из названия стрима
-            try:
-                symbol = stream_name.split('@')[0].upper()
-            except IndexError:
-                logger.warning(f"Could not extract symbol from stream: {stream_name}")
+            # Символ и обработчик берем из заранее построенной таблицы стримов - без разбора строки
+            entry = self.stream_dispatch.get(stream_name)
+            if entry is None:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Unhandled message for stream: %s", stream_name)
                 return
 
-            # Обрабатываем разные типы событий
-            if event_type == 'kline' and stream_name.endswith(f'@kline_{config.TIMEFRAME}'):
-                await self.process_kline_data(symbol, data)
-            elif event_type == 'forceOrder' and '@forceOrder' in stream_name:
-                await self.process_open_interest_data(symbol, data)
-            else:
-                logger.debug(f"Unhandled event type: {event_type} for stream: {stream_name}")
+            symbol, handler = entry
+            await handler(symbol, msg.get('data', {}))
                 
         except Exception as e:
             logger.error(f"Error processing WebSocket message: {e}")
 
-    async def process_kline_data(self, symbol, data):
-        """Обрабатывает данные свечей (kline)"""
+    async def handle_kline_event(self, symbol, data):
+        """Отсеивает обновления незакрытой свечи и передает закрытые в process_kline_data"""
+        # Почти все сообщения - обновления незакрытой свечи: отбрасываем их сразу
+        kline_data = data.get('k')
+        if not kline_data:
+            logger.warning(f"No kline data in message for {symbol}")
+            return
+        if not kline_data.get('x', False):
+            return
+        await self.process_kline_data(symbol, kline_data)
+
+    async def handle_force_order_event(self, symbol, data):
+        """Передает ликвидации по отслеживаемым символам в process_open_interest_data"""
+        # Общий стрим присылает ликвидации по всем символам - символ берем из самого ордера
+        symbol = data.get('o', {}).get('s')
+        if symbol in self.active_symbols:
+            await self.process_open_interest_data(symbol, data)
+
+    async def process_kline_data(self, symbol, kline_data):
+        """Обрабатывает закрытую свечу (поле 'k' сообщения); незакрытые и пустые отсеивает handle_kline_event"""
         try:
-            kline_data = data.get('k')
-            if not kline_data:
-                logger.warning(f"No kline data in message for {symbol}")
-                return
-
-            # Проверяем, что свеча закрылась
-            is_kline_closed = kline_data.get('x', False)
-            if not is_kline_closed:
-                logger.debug(f"Kline not closed yet for {symbol}")
-                return
-
             # Парсим данные свечи
             try:
-                new_kline_entry = {
-                    'timestamp': pd.to_datetime(kline_data['t'], unit='ms'),
-                    'open': float(kline_data['o']),
-                    'high': float(kline_data['h']),
-                    'low': float(kline_data['l']),
-                    'close': float(kline_data['c']),
-                    'volume': float(kline_data['v'])
-                }
+                timestamp, open_price, high_price, low_price, close_price, volume = KLINE_FIELDS(kline_data)
+                timestamp = int(timestamp)
+                open_price = float(open_price)
+                high_price = float(high_price)
+                low_price = float(low_price)
+                close_price = float(close_price)
+                volume = float(volume)
             except (KeyError, ValueError) as e:
                 logger.error(f"Error parsing kline data for {symbol}: {e}")
                 return
 
             # Проверяем, что у нас есть данные для этого символа
-            if symbol not in self.symbol_kline_data:
+            ring = self.symbol_kline_data.get(symbol)
+            if ring is None:
                 logger.warning(f"Symbol {symbol} not in tracked symbols")
                 return
 
-            # Добавляем новую свечу в очередь
-            self.symbol_kline_data[symbol].append(new_kline_entry)
-            logger.debug(f"Added new kline for {symbol}: close={new_kline_entry['close']}")
+            # Записываем новую свечу в кольцевой буфер
+            ring.append(timestamp, open_price, high_price, low_price, close_price, volume)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Added new kline for %s: close=%s", symbol, close_price)
             
-            # Создаем DataFrame для анализа
-            klines_df = pd.DataFrame(list(self.symbol_kline_data[symbol]))
+            # Окно свечей для анализа: views массивов буфера, без сборки DataFrame
+            klines = ring.window()
+            # Продвигаем RSI/ATR на каждой свече, в том числе во время cooldown,
+            # чтобы состояние не устаревало и не требовало полного пересчёта
+            self.strategy_checker.update_indicators(symbol, klines)
             
             # Получаем данные об открытом интересе
-            current_oi_info = self.symbol_open_interest_data.get(symbol, {})
-            current_oi = current_oi_info.get('current_oi')
-            prev_oi = current_oi_info.get('prev_oi')
+            current_oi, prev_oi = self.symbol_open_interest_data.get(symbol)
 
             # Проверяем cooldown (чтобы не спамить сигналами)
             if symbol in self.last_signal_time:
-                time_since_last = (datetime.now() - self.last_signal_time[symbol]).total_seconds()
+                time_since_last = time.monotonic() - self.last_signal_time[symbol]
                 if time_since_last < config.COOLDOWN_BETWEEN_SIGNALS:
-                    logger.debug(f"Cooldown active for {symbol}: {time_since_last:.0f}s remaining")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Cooldown active for %s: %.0fs remaining", symbol, time_since_last)
                     return
 
             # Если у нас нет данных об открытом интересе, получаем их
             if current_oi is None:
-                logger.debug(f"Getting initial open interest data for {symbol}")
+                logger.debug("Getting initial open interest data for %s", symbol)
                 current_oi = await self.binance_handler.get_open_interest(symbol)
                 if current_oi is not None:
-                    self.symbol_open_interest_data[symbol] = {
-                        'current_oi': current_oi,
-                        'prev_oi': None,
-                        'timestamp': datetime.now().timestamp()
-                    }
+                    self.symbol_open_interest_data.update(symbol, current_oi)
 
             # Проверяем стратегию на сигнал
-            signal = self.strategy_checker.process_kline_data(symbol, klines_df, current_oi, prev_oi)
+            signal = self.strategy_checker.process_kline_data(symbol, klines, current_oi, prev_oi)
             if signal:
-                await self.telegram_bot.send_message(signal)
-                self.last_signal_time[symbol] = datetime.now()
+                # Отправка идет в фоне: обработка свечей не ждет ответа Telegram
+                self.telegram_bot.enqueue_message(signal)
+                self.last_signal_time[symbol] = time.monotonic()
                 logger.info(f"Trading signal sent for {symbol}")
 
             # Обновляем историю открытого интереса
-            if current_oi is not None and symbol in self.symbol_open_interest_data:
-                self.symbol_open_interest_data[symbol]['prev_oi'] = current_oi
+            if current_oi is not None:
+                self.symbol_open_interest_data.set_prev(symbol, current_oi)
 
         except Exception as e:
             logger.error(f"Error processing kline data for {symbol}: {e}")
@@ -207,31 +224,47 @@ class CryptoScalpingBot:
         try:
             # Force order stream используется как прокси для изменений открытого интереса
             # Это не идеальное решение, но WebSocket для OI может быть нестабильным
-            logger.debug(f"Force order event for {symbol} - updating OI data")
-            
-            # Получаем актуальные данные об открытом интересе через REST API
-            current_oi = await self.binance_handler.get_open_interest(symbol)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Force order event for %s - marking OI data for refresh", symbol)
             
-            if current_oi is not None:
-                # Обновляем данные открытого интереса
-                if symbol not in self.symbol_open_interest_data:
-                    self.symbol_open_interest_data[symbol] = {
-                        'current_oi': current_oi,
-                        'prev_oi': None,
-                        'timestamp': datetime.now().timestamp()
-                    }
-                else:
-                    # Сохраняем предыдущее значение
-                    prev_oi = self.symbol_open_interest_data[symbol]['current_oi']
-                    self.symbol_open_interest_data[symbol]['prev_oi'] = prev_oi
-                    self.symbol_open_interest_data[symbol]['current_oi'] = current_oi
-                    self.symbol_open_interest_data[symbol]['timestamp'] = datetime.now().timestamp()
-
-                logger.debug(f"Updated open interest for {symbol}: {current_oi}")
+            # Только помечаем символ: во время каскада ликвидаций событий десятки в секунду,
+            # а REST запрос открытого интереса делает _oi_refresh_loop пакетами
+            self._oi_dirty.add(symbol)
 
         except Exception as e:
             logger.error(f"Error processing open interest data for {symbol}: {e}")
 
+    async def _oi_refresh_loop(self):
+        """Периодически обновляет открытый интерес помеченных символов одним пакетом запросов"""
+        while self.running:
+            await asyncio.sleep(config.OI_REFRESH_INTERVAL)
+            if not self._oi_dirty:
+                continue
+
+            # Берём символы, для которых выдержан минимальный интервал между запросами
+            now = time.monotonic()
+            batch = [
+                symbol for symbol in self._oi_dirty
+                if now - self._oi_last_fetch.get(symbol, 0.0) >= config.OI_MIN_FETCH_INTERVAL
+            ][:config.OI_REFRESH_BATCH]
+            if not batch:
+                continue
+            self._oi_dirty.difference_update(batch)
+            for symbol in batch:
+                self._oi_last_fetch[symbol] = now
+
+            results = await asyncio.gather(
+                *(self.binance_handler.get_open_interest(symbol) for symbol in batch),
+                return_exceptions=True
+            )
+            for symbol, current_oi in zip(batch, results):
+                if isinstance(current_oi, Exception):
+                    logger.error(f"Error refreshing open interest for {symbol}: {current_oi}")
+                elif current_oi is not None:
+                    # Обновляем данные открытого интереса (предыдущее значение сохраняется)
+                    self.symbol_open_interest_data.update(symbol, current_oi)
+                    logger.debug("Updated open interest for %s: %s", symbol, current_oi)
+
     async def initialize_symbols(self):
         """Инициализирует символы для мониторинга и загружает исторические данные"""
         logger.info("Starting symbol initialization...")
@@ -264,43 +297,59 @@ class CryptoScalpingBot:
             else:
                 symbol_list_msg += f"{', '.join(monitored_symbols[:20])} and {len(monitored_symbols)-20} more..."
                 
-            await self.telegram_bot.send_message(symbol_list_msg)
+            self.telegram_bot.enqueue_message(symbol_list_msg)
+
+            # Загружаем исторические данные свечей и OI параллельно, ограничивая число одновременных запросов
+            logger.info(f"Loading historical data for {len(monitored_symbols)} symbols...")
+            semaphore = asyncio.Semaphore(config.INIT_CONCURRENCY)
+
+            async def load_symbol(symbol):
+                # Свечи и открытый интерес символа грузим одной задачей, без барьера между этапами
+                async with semaphore:
+                    klines_df = await self.binance_handler.get_initial_klines(symbol)
+                    if klines_df.empty:
+                        return klines_df, None
+                    try:
+                        initial_oi = await self.binance_handler.get_open_interest(symbol)
+                    except Exception as e:
+                        logger.error(f"Failed to get initial open interest for {symbol}: {e}")
+                        initial_oi = None
+                    return klines_df, initial_oi
+
+            results = await asyncio.gather(
+                *(load_symbol(symbol) for symbol in monitored_symbols),
+                return_exceptions=True
+            )
 
-            # Загружаем исторические данные для каждого символа
             successful_symbols = []
-            for i, symbol in enumerate(monitored_symbols):
+            initial_open_interest = {}
+            for symbol, result in zip(monitored_symbols, results):
                 try:
-                    logger.info(f"Loading historical data for {symbol} ({i+1}/{len(monitored_symbols)})")
-                    
-                    # Загружаем исторические данные свечей
-                    initial_klines_df = await self.binance_handler.get_initial_klines(symbol)
+                    if isinstance(result, Exception):
+                        raise result
+
+                    initial_klines_df, initial_oi = result
                     if not initial_klines_df.empty:
-                        self.symbol_kline_data[symbol] = deque(
-                            initial_klines_df.to_dict('records'),
-                            maxlen=config.KLINE_LIMIT + 20  # Немного больше для безопасности
-                        )
+                        ring = KlineRing(config.KLINE_LIMIT + 20)  # Немного больше для безопасности
+                        ring.load(initial_klines_df)
+                        self.symbol_kline_data[symbol] = ring
+                        self.strategy_checker.update_indicators(symbol, ring.window())  # Один полный проход по истории
                         successful_symbols.append(symbol)
-                        logger.debug(f"Loaded {len(initial_klines_df)} klines for {symbol}")
+                        initial_open_interest[symbol] = initial_oi
+                        logger.debug("Loaded %d klines for %s", len(initial_klines_df), symbol)
                     else:
                         logger.warning(f"No historical data available for {symbol}")
-                        continue
-                    
-                    # Получаем начальные данные об открытом интересе
-                    initial_oi = await self.binance_handler.get_open_interest(symbol)
-                    self.symbol_open_interest_data[symbol] = {
-                        'current_oi': initial_oi,
-                        'prev_oi': None,
-                        'timestamp': datetime.now().timestamp()
-                    }
-                    
-                    # Небольшая задержка чтобы не перегружать API
-                    if i % 10 == 0 and i > 0:
-                        await asyncio.sleep(1)
                         
                 except Exception as e:
                     logger.error(f"Failed to initialize {symbol}: {e}")
                     continue
 
+            # Начальные данные об открытом интересе, полученные вместе со свечами
+            self.symbol_open_interest_data = OpenInterestTable(successful_symbols)
+            for symbol, initial_oi in initial_open_interest.items():
+                if initial_oi is not None:
+                    self.symbol_open_interest_data.update(symbol, initial_oi)
+
             logger.info(f"Successfully initialized {len(successful_symbols)} symbols")
             return successful_symbols
 
@@ -312,30 +361,29 @@ class CryptoScalpingBot:
     async def setup_websocket_connection(self, symbols):
         """Настраивает WebSocket соединение со стримами"""
         try:
-            # Определяем, тестовая ли сеть
-            is_testnet = "testnet" in config.BINANCE_FUTURES_BASE_URL_REST
-            
-            # Инициализируем клиент
-            self.client = await AsyncClient.create(
-                config.BINANCE_API_KEY,
-                config.BINANCE_API_SECRET,
-                testnet=is_testnet
-            )
-            self.websocket_manager = BinanceSocketManager(self.client)
+            # Используем клиент и менеджер сокетов binance_handler, а не открываем второе соединение
+            await self.binance_handler.ensure_client()
+            self.websocket_manager = self.binance_handler.bsm
 
             # Создаем список стримов
             streams = []
-            active_symbols = [s for s in symbols if s in self.symbol_kline_data]
+            self.active_symbols = frozenset(symbols).intersection(self.symbol_kline_data)
+            active_symbols = [s for s in symbols if s in self.active_symbols]
             
             for symbol in active_symbols:
                 # Стрим данных свечей
-                streams.append(f"{symbol.lower()}@kline_{config.TIMEFRAME}")
-                # Стрим force orders (как прокси для изменений OI)
-                streams.append(f"{symbol.lower()}@forceOrder")
+                streams.append(symbol.lower() + KLINE_SUFFIX)
+            self.stream_dispatch = {
+                stream: (symbol, self.handle_kline_event) for stream, symbol in zip(streams, active_symbols)
+            }
 
             if not streams:
                 raise Exception("No streams available for subscription")
 
+            # Один общий стрим force orders (как прокси для изменений OI) вместо стрима на каждый символ
+            streams.append(FORCE_ORDER_STREAM)
+            self.stream_dispatch[FORCE_ORDER_STREAM] = (None, self.handle_force_order_event)
+
             logger.info(f"Prepared {len(streams)} streams for {len(active_symbols)} symbols")
             return streams
 
@@ -343,29 +391,85 @@ class CryptoScalpingBot:
             logger.error(f"Error setting up WebSocket connection: {e}")
             raise
 
+    async def _receive_messages(self, socket):
+        """Читает сообщения WebSocket в очередь обработки, не дожидаясь самой обработки"""
+        # Внутренняя очередь ReconnectingWebsocket: позволяет забрать накопившиеся сообщения без ожидания
+        socket_queue = getattr(socket, '_queue', None)
+        while self.running:
+            try:
+                batch = [await socket.recv()]
+                self._last_msg_ts = time.monotonic()
+                if socket_queue is not None:
+                    while True:
+                        try:
+                            batch.append(socket_queue.get_nowait())
+                        except asyncio.QueueEmpty:
+                            break
+                
+                for msg in batch:
+                    try:
+                        self._message_queue.put_nowait(msg)
+                    except asyncio.QueueFull:
+                        # Обработка не успевает: отбрасываем сообщение, а не останавливаем чтение
+                        self._dropped_messages += 1
+                        if self._dropped_messages % 1000 == 1:
+                            logger.warning(f"Message queue is full, {self._dropped_messages} messages dropped so far")
+                
+            except Exception as e:
+                logger.error(f"Error receiving WebSocket message: {e}")
+                await asyncio.sleep(1)
+
+    async def _process_messages(self):
+        """Обрабатывает сообщения из очереди пачками, пока бот работает"""
+        queue = self._message_queue
+        while self.running:
+            try:
+                batch = [await queue.get()]
+                while True:
+                    try:
+                        batch.append(queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+                
+                for msg in batch:
+                    await self.process_message(msg)
+                
+            except Exception as e:
+                logger.error(f"Error processing WebSocket message: {e}")
+                await asyncio.sleep(1)
+
+    async def _inactivity_watchdog(self):
+        """Завершается, возвращая время простоя, когда от WebSocket слишком долго нет сообщений"""
+        while self.running:
+            idle = time.monotonic() - self._last_msg_ts
+            if idle >= WEBSOCKET_INACTIVITY_TIMEOUT:
+                return idle
+            await asyncio.sleep(WEBSOCKET_INACTIVITY_TIMEOUT - idle)
+
     async def run_websocket_loop(self, streams):
         """Основной цикл WebSocket с логикой переподключения"""
         while self.running:
             try:
                 logger.info("Connecting to WebSocket...")
-                async with self.websocket_manager.multiplex_socket(streams) as socket:
+                async with self.websocket_manager.futures_multiplex_socket(streams) as socket:
                     logger.info("✅ WebSocket connected successfully")
-                    await self.telegram_bot.send_message("🔗 WebSocket connected, monitoring started!")
+                    self.telegram_bot.enqueue_message("🔗 WebSocket connected, monitoring started!")
                     self.reconnect_count = 0
                     
-                    while self.running:
-                        try:
-                            # Ждем сообщение с таймаутом
-                            msg = await asyncio.wait_for(socket.recv(), timeout=30.0)
-                            await self.process_message(msg)
-                            await self.send_heartbeat()
-                            
-                        except asyncio.TimeoutError:
-                            logger.debug("WebSocket timeout, sending ping...")
-                            continue
-                        except Exception as e:
-                            logger.error(f"Error processing WebSocket message: {e}")
-                            await asyncio.sleep(1)
+                    # Один сторожевой таймер на соединение вместо wait_for (и таймера) на каждое сообщение
+                    self._last_msg_ts = time.monotonic()
+                    receiver = asyncio.create_task(self._receive_messages(socket))
+                    watchdog = asyncio.create_task(self._inactivity_watchdog())
+                    try:
+                        await asyncio.wait((receiver, watchdog), return_when=asyncio.FIRST_COMPLETED)
+                    finally:
+                        receiver.cancel()
+                        watchdog.cancel()
+                        await asyncio.gather(receiver, watchdog, return_exceptions=True)
+                    
+                    idle = None if watchdog.cancelled() else watchdog.result()
+                    if idle is not None:
+                        raise ConnectionError(f"No WebSocket messages for {idle:.0f}s")
 
             except Exception as e:
                 self.reconnect_count += 1
@@ -373,7 +477,8 @@ class CryptoScalpingBot:
                 
                 if self.reconnect_count >= config.MAX_RECONNECT_ATTEMPTS:
                     logger.critical(f"Max reconnection attempts reached ({config.MAX_RECONNECT_ATTEMPTS})")
-                    await self.telegram_bot.send_message("🚨 Max reconnection attempts reached. Bot stopping.")
+                    # Уходит через очередь Telegram; cleanup() дошлет ее перед выходом
+                    self.telegram_bot.enqueue_message("🚨 Max reconnection attempts reached. Bot stopping.")
                     break
                 
                 # Ждем перед повторным подключением
@@ -406,6 +511,14 @@ class CryptoScalpingBot:
             # Настраиваем WebSocket
             streams = await self.setup_websocket_connection(symbols)
             
+            # Обработка сообщений, обновление открытого интереса по force order событиям
+            # и статус идут в отдельных задачах; run_websocket_loop только читает сокет
+            self._background_tasks = [
+                asyncio.create_task(self._process_messages()),
+                asyncio.create_task(self._oi_refresh_loop()),
+                asyncio.create_task(self._heartbeat_loop())
+            ]
+            
             # Запускаем основной цикл
             await self.run_websocket_loop(streams)
             
@@ -421,13 +534,18 @@ class CryptoScalpingBot:
         logger.info("Cleaning up resources...")
         self.running = False
         
-        if self.client:
-            await self.client.close_connection()
-            logger.info("Binance client connection closed")
+        for task in self._background_tasks:
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        self._background_tasks = []
         
         if self.binance_handler:
             await self.binance_handler.close_connection()
             logger.info("Binance handler closed")
+        
+        if self.telegram_bot:
+            # Досылаем сообщения, оставшиеся в очереди
+            await self.telegram_bot.close()
 
     def handle_signal(self, signum, frame):
         """Обработка сигналов завершения"""
@@ -452,6 +570,10 @@ async def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Цикл событий на libuv заметно быстрее стандартного на потоке WebSocket сообщений
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -0,0 +1,144 @@
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class KlineWindow(NamedTuple):
+    """Окно свечей в хронологическом порядке (views массивов буфера, последняя свеча в конце)"""
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+
+class KlineRing:
+    """
+    Кольцевой буфер свечей: параллельные массивы NumPy вместо очереди словарей
+
+    Каждый массив имеет длину 2 * capacity, и каждая свеча пишется в обе половины.
+    Благодаря этому последние count свечей всегда лежат в памяти непрерывно,
+    и окно для стратегии отдаётся срезом без копирования.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamp = np.empty(2 * capacity, dtype=np.int64)  # Время открытия свечи, мс
+        self.open = np.empty(2 * capacity, dtype=np.float64)
+        self.high = np.empty(2 * capacity, dtype=np.float64)
+        self.low = np.empty(2 * capacity, dtype=np.float64)
+        self.close = np.empty(2 * capacity, dtype=np.float64)
+        self.volume = np.empty(2 * capacity, dtype=np.float64)
+        self.head = 0  # Индекс следующей записи
+        self.count = 0  # Количество заполненных ячеек
+
+    def __len__(self):
+        return self.count
+
+    def push(self) -> int:
+        """Резервирует ячейку под новую свечу и возвращает её индекс"""
+        i = self.head
+        self.head = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        return i
+
+    def append(self, timestamp: int, open_: float, high: float, low: float, close: float, volume: float):
+        """Записывает закрытую свечу на место самой старой"""
+        i = self.push()
+        j = i + self.capacity
+        self.timestamp[i] = self.timestamp[j] = timestamp
+        self.open[i] = self.open[j] = open_
+        self.high[i] = self.high[j] = high
+        self.low[i] = self.low[j] = low
+        self.close[i] = self.close[j] = close
+        self.volume[i] = self.volume[j] = volume
+
+    def load(self, klines_df: pd.DataFrame):
+        """Заполняет буфер историческими свечами из DataFrame"""
+        klines_df = klines_df.tail(self.capacity)
+        n = len(klines_df)
+        timestamps = klines_df['timestamp'].to_numpy()
+        if np.issubdtype(timestamps.dtype, np.datetime64):
+            timestamps = timestamps.astype('datetime64[ms]').astype(np.int64)
+        columns = (
+            (self.timestamp, timestamps),
+            (self.open, klines_df['open'].to_numpy(dtype=np.float64)),
+            (self.high, klines_df['high'].to_numpy(dtype=np.float64)),
+            (self.low, klines_df['low'].to_numpy(dtype=np.float64)),
+            (self.close, klines_df['close'].to_numpy(dtype=np.float64)),
+            (self.volume, klines_df['volume'].to_numpy(dtype=np.float64)),
+        )
+        for target, values in columns:
+            target[:n] = values
+            target[self.capacity:self.capacity + n] = values
+        self.head = n % self.capacity
+        self.count = n
+
+    def _ordered(self, values: np.ndarray) -> np.ndarray:
+        """Возвращает значения в хронологическом порядке (всегда view, без копии)"""
+        if self.count < self.capacity:
+            return values[:self.count]
+        return values[self.head:self.head + self.capacity]
+
+    def window(self) -> KlineWindow:
+        """Отдаёт окно свечей для стратегии как views массивов, без DataFrame и без копий"""
+        return KlineWindow(
+            self._ordered(self.timestamp),
+            self._ordered(self.open),
+            self._ordered(self.high),
+            self._ordered(self.low),
+            self._ordered(self.close),
+            self._ordered(self.volume)
+        )
+
+
+class OpenInterestTable:
+    """
+    Открытый интерес по символам: параллельные массивы NumPy вместо словаря словарей
+
+    Отсутствующие значения хранятся как NaN. Индекс символа строится один раз,
+    поэтому сводная аналитика по всем символам сводится к векторным операциям.
+    """
+
+    def __init__(self, symbols: List[str]):
+        self.symbol_idx = {symbol: i for i, symbol in enumerate(symbols)}
+        self.current_oi = np.full(len(symbols), np.nan)
+        self.prev_oi = np.full(len(symbols), np.nan)
+        self.timestamp = np.full(len(symbols), np.nan)  # Время последнего обновления, time.monotonic
+
+    def __len__(self):
+        return len(self.symbol_idx)
+
+    def __contains__(self, symbol):
+        return symbol in self.symbol_idx
+
+    def get(self, symbol: str) -> Tuple[Optional[float], Optional[float]]:
+        """Возвращает (текущий, предыдущий) открытый интерес; None, если значения нет"""
+        i = self.symbol_idx.get(symbol)
+        if i is None:
+            return None, None
+        current_oi = self.current_oi[i]
+        prev_oi = self.prev_oi[i]
+        return (
+            None if np.isnan(current_oi) else float(current_oi),
+            None if np.isnan(prev_oi) else float(prev_oi)
+        )
+
+    def update(self, symbol: str, open_interest: float):
+        """Записывает новое значение, сдвигая текущее в предыдущее"""
+        i = self.symbol_idx.get(symbol)
+        if i is None:
+            return
+        self.prev_oi[i] = self.current_oi[i]
+        self.current_oi[i] = open_interest
+        self.timestamp[i] = time.monotonic()
+
+    def set_prev(self, symbol: str, open_interest: float):
+        """Запоминает значение, с которым будет сравниваться следующее изменение"""
+        i = self.symbol_idx.get(symbol)
+        if i is not None:
+            self.prev_oi[i] = open_interest
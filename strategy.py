@@ -1,6 +1,8 @@
-import pandas as pd
+import functools
 import logging
-from utils import calculate_rsi, calculate_atr
+import math
+import time
+from utils import rsi_update, atr_update, rsi_averages, atr_wilder, rsi_from_averages
 from config import (
     RSI_PERIOD, RSI_OVERBOUGHT, RSI_OVERSOLD, ATR_PERIOD,
     MIN_OI_CHANGE_PERCENT, MIN_VOLUME_MULTIPLIER,
@@ -9,11 +11,96 @@ from config import (
 
 logger = logging.getLogger(__name__)
 
+# Свечей для полного пересчета RSI/ATR: вклад отброшенной истории не больше (1 - 1/period) ** (5 * period),
+# т.е. около 0.6% при периоде 14 (см. utils.py)
+WARMUP_CANDLES = max(RSI_PERIOD, ATR_PERIOD) * 5 + 1
+# Минимум свечей для расчета индикаторов
+REQUIRED_DATA_LENGTH = max(RSI_PERIOD + 1, ATR_PERIOD + 1)
+
+@functools.lru_cache(maxsize=None)
+def _signal_strength(rsi_level, oi_level, high_volume, trend_confirmed):
+    """
+    Сила сигнала по классам факторов (0-2 для RSI и OI): всего 36 комбинаций,
+    поэтому результат с описанием строится один раз и дальше берется из кэша
+    """
+    strength = rsi_level + oi_level + int(high_volume)
+    factors = []
+    
+    # RSI фактор (max 2 звезды)
+    if rsi_level == 2:  # Экстремальные значения
+        factors.append("extreme RSI")
+    elif rsi_level == 1:
+        factors.append("RSI signal")
+    
+    # OI фактор (max 2 звезды)
+    if oi_level == 2:  # Очень сильный рост OI
+        factors.append("strong OI growth")
+    elif oi_level == 1:
+        factors.append("OI growth")
+    
+    # Volume фактор (max 1 звезда)
+    if high_volume:
+        factors.append("high volume")
+    
+    # Trend фактор (бонус/штраф)
+    if not trend_confirmed:
+        strength = max(0, strength - 1)  # Штраф за неподтверждённый тренд
+        factors.append("weak trend")
+    
+    strength = min(5, max(1, strength))  # Ограничиваем от 1 до 5
+    description = " + ".join(factors) if factors else "basic signal"
+    
+    return strength, description
+
+class IndicatorState:
+    """Сглаженные средние RSI и ATR одного символа на момент последней учтённой свечи"""
+    __slots__ = ('timestamp', 'close', 'avg_gain', 'avg_loss', 'atr')
+
+    def __init__(self, timestamp, close, avg_gain, avg_loss, atr):
+        self.timestamp = timestamp
+        self.close = close
+        self.avg_gain = avg_gain
+        self.avg_loss = avg_loss
+        self.atr = atr
+
+    @classmethod
+    def seed(cls, klines, full=False):
+        """
+        Полный проход по окну свечей (при загрузке истории или после пропуска свечей)
+        
+        По умолчанию берутся только последние WARMUP_CANDLES свечей: сглаживание Уайлдера
+        к этому моменту уже сошлось. full=True считает по всему окну (для сверки).
+        """
+        if full:
+            high, low, close = klines.high, klines.low, klines.close
+        else:
+            high = klines.high[-WARMUP_CANDLES:]
+            low = klines.low[-WARMUP_CANDLES:]
+            close = klines.close[-WARMUP_CANDLES:]
+        avg_gain, avg_loss = rsi_averages(close, RSI_PERIOD)
+        atr = atr_wilder(high, low, close, ATR_PERIOD)
+        return cls(klines.timestamp[-1], klines.close[-1], avg_gain, avg_loss, atr)
+
+    def update(self, timestamp, high, low, close):
+        """Один шаг сглаживания Уайлдера по новой закрытой свече, O(1)"""
+        self.avg_gain, self.avg_loss = rsi_update(
+            self.avg_gain, self.avg_loss, self.close, close, RSI_PERIOD
+        )
+        self.atr = atr_update(self.atr, high, low, self.close, ATR_PERIOD)
+        self.timestamp = timestamp
+        self.close = close
+
+    @property
+    def rsi(self):
+        return rsi_from_averages(self.avg_gain, self.avg_loss)
+
+
 class Strategy:
     def __init__(self):
         """Инициализация стратегии с улучшенными параметрами"""
         self.min_oi_change_percent = MIN_OI_CHANGE_PERCENT
         self.min_volume_multiplier = MIN_VOLUME_MULTIPLIER
+        self.indicator_state = {}  # symbol -> IndicatorState для инкрементального пересчёта RSI/ATR
         
         logger.info(f"Strategy initialized with parameters:")
         logger.info(f"  - RSI period: {RSI_PERIOD} (oversold: {RSI_OVERSOLD}, overbought: {RSI_OVERBOUGHT})")
@@ -21,6 +108,34 @@ class Strategy:
         logger.info(f"  - Min OI change: {self.min_oi_change_percent}%")
         logger.info(f"  - Min volume multiplier: {self.min_volume_multiplier}x")
         
+    def update_indicators(self, symbol, klines):
+        """
+        Возвращает RSI и ATR последней свечи, пересчитывая их инкрементально
+        
+        Если прошлый вызов был на предыдущей свече, достаточно одного шага сглаживания
+        Уайлдера (O(1)); повторный вызов на той же свече ничего не пересчитывает.
+        Иначе (первый вызов, пропуск свечей) индикаторы считаются по всему окну
+        заново и состояние сеется повторно.
+        
+        Args:
+            symbol (str): Символ монеты
+            klines (KlineWindow): Окно свечей (массивы NumPy)
+            
+        Returns:
+            tuple: (float, float) - (RSI, ATR)
+        """
+        timestamps = klines.timestamp
+        state = self.indicator_state.get(symbol)
+        
+        if state is not None and state.timestamp == timestamps[-1]:
+            pass  # Свеча уже учтена
+        elif state is not None and len(timestamps) > 1 and state.timestamp == timestamps[-2]:
+            state.update(timestamps[-1], klines.high[-1], klines.low[-1], klines.close[-1])
+        else:
+            state = self.indicator_state[symbol] = IndicatorState.seed(klines)
+        
+        return state.rsi, state.atr
+
     def calculate_oi_change_percent(self, current_oi, prev_oi):
         """
         Рассчитывает процентное изменение открытого интереса
@@ -36,26 +151,25 @@ class Strategy:
             return 0.0
         
         change_percent = ((current_oi - prev_oi) / prev_oi) * 100
-        logger.debug(f"OI change: {prev_oi:.0f} -> {current_oi:.0f} ({change_percent:+.2f}%)")
+        logger.debug("OI change: %.0f -> %.0f (%+.2f%%)", prev_oi, current_oi, change_percent)
         return change_percent
 
-    def is_strong_volume(self, klines_df):
+    def is_strong_volume(self, volume):
         """
         Проверяет, есть ли сильный объем на последних свечах
         
         Args:
-            klines_df (pd.DataFrame): DataFrame с данными свечей
+            volume (np.ndarray): Объемы свечей
             
         Returns:
             tuple: (bool, float) - (является ли объём сильным, отношение к среднему)
         """
-        if len(klines_df) < 20:
+        if len(volume) < 20:
             return True, 1.0  # Если мало данных, не фильтруем по объему
             
         # Берем последние 20 свечей для расчета среднего объема
-        recent_volumes = klines_df['volume'].tail(20)
-        avg_volume = recent_volumes.mean()
-        last_volume = klines_df['volume'].iloc[-1]
+        avg_volume = volume[-20:].mean()
+        last_volume = volume[-1]
         
         if avg_volume == 0:
             return True, 1.0
@@ -63,68 +177,68 @@ class Strategy:
         volume_ratio = last_volume / avg_volume
         is_strong = volume_ratio >= self.min_volume_multiplier
         
-        logger.debug(f"Volume analysis: last={last_volume:.0f}, avg={avg_volume:.0f}, ratio={volume_ratio:.2f}x")
+        logger.debug("Volume analysis: last=%.0f, avg=%.0f, ratio=%.2fx", last_volume, avg_volume, volume_ratio)
         return is_strong, volume_ratio
 
-    def is_trend_confirmation(self, klines_df, signal_type):
+    def is_trend_confirmation(self, close, high, low, signal_type):
         """
         Подтверждает направление тренда по последним свечам
         
         Args:
-            klines_df (pd.DataFrame): DataFrame с данными свечей
+            close (np.ndarray): Цены закрытия
+            high (np.ndarray): Максимумы свечей
+            low (np.ndarray): Минимумы свечей
             signal_type (str): 'LONG' или 'SHORT'
             
         Returns:
             tuple: (bool, str) - (подтверждается ли тренд, описание)
         """
-        if len(klines_df) < 5:
+        if len(close) < 5:
             return True, "insufficient data"
             
-        # Берем последние 5 свечей
-        recent_closes = klines_df['close'].tail(5)
-        recent_highs = klines_df['high'].tail(5)
-        recent_lows = klines_df['low'].tail(5)
+        # Нужны только отдельные значения последних свечей, срезы не создаём
+        last_close = close[-1]
+        close_m3 = close[-3]
         
         # Анализируем движение цены
-        price_momentum = (recent_closes.iloc[-1] - recent_closes.iloc[-3]) / recent_closes.iloc[-3]
+        price_momentum = (last_close - close_m3) / close_m3
         
         if signal_type == 'LONG':
             # Для лонга: цена не должна сильно падать и должен быть хотя бы небольшой отскок
             trend_ok = price_momentum > -0.01  # Падение не более 1%
-            bounce_ok = recent_closes.iloc[-1] >= recent_lows.iloc[-2]  # Цена выше предыдущего минимума
+            bounce_ok = last_close >= low[-2]  # Цена выше предыдущего минимума
             confirmation = trend_ok and bounce_ok
             description = f"momentum: {price_momentum:.3f}, bounce: {bounce_ok}"
         else:  # SHORT
             # Для шорта: цена не должна сильно расти и должен быть хотя бы небольшой откат
             trend_ok = price_momentum < 0.01  # Рост не более 1%
-            pullback_ok = recent_closes.iloc[-1] <= recent_highs.iloc[-2]  # Цена ниже предыдущего максимума
+            pullback_ok = last_close <= high[-2]  # Цена ниже предыдущего максимума
             confirmation = trend_ok and pullback_ok
             description = f"momentum: {price_momentum:.3f}, pullback: {pullback_ok}"
         
-        logger.debug(f"Trend confirmation for {signal_type}: {confirmation} ({description})")
+        logger.debug("Trend confirmation for %s: %s (%s)", signal_type, confirmation, description)
         return confirmation, description
 
-    def calculate_dynamic_levels(self, klines_df, atr):
+    def calculate_dynamic_levels(self, high, low, close, atr):
         """
         Рассчитывает динамические уровни стоп-лосса и тейк-профита
         
         Args:
-            klines_df (pd.DataFrame): DataFrame с данными свечей
+            high (np.ndarray): Максимумы свечей
+            low (np.ndarray): Минимумы свечей
+            close (np.ndarray): Цены закрытия
             atr (float): Значение ATR
             
         Returns:
             tuple: (stop_multiplier, take_multiplier, volatility_info)
         """
-        if len(klines_df) < 20:
+        if len(close) < 20:
             return (STOP_LOSS_ATR_MULTIPLIER, TAKE_PROFIT_ATR_MULTIPLIER, "insufficient data")
             
         # Анализируем волатильность последних 20 свечей
-        recent_highs = klines_df['high'].tail(20)
-        recent_lows = klines_df['low'].tail(20)
-        recent_closes = klines_df['close'].tail(20)
-        avg_close = recent_closes.mean()
+        avg_close = close[-20:].mean()
         
-        volatility = (recent_highs.max() - recent_lows.min()) / avg_close
+        volatility = (high[-20:].max() - low[-20:].min()) / avg_close
         
         # Адаптируем мультипликаторы в зависимости от волатильности
         if volatility > 0.05:  # Высокая волатильность (>5%)
@@ -138,7 +252,7 @@ class Strategy:
             vol_level = "low"
         
         vol_info = f"{vol_level} ({volatility:.3f})"
-        logger.debug(f"Volatility analysis: {vol_info}, multipliers: SL={stop_mult}, TP={take_mult}")
+        logger.debug("Volatility analysis: %s, multipliers: SL=%s, TP=%s", vol_info, stop_mult, take_mult)
         
         return (stop_mult, take_mult, vol_info)
 
@@ -155,49 +269,31 @@ class Strategy:
         Returns:
             tuple: (int, str) - (количество звёзд, описание)
         """
-        strength = 0
-        factors = []
-        
-        # RSI фактор (max 2 звезды)
+        # Сводим значения к классам порогов: результат по ним точный и кэшируется
         if rsi <= 25 or rsi >= 75:  # Экстремальные значения
-            strength += 2
-            factors.append("extreme RSI")
+            rsi_level = 2
         elif rsi <= RSI_OVERSOLD or rsi >= RSI_OVERBOUGHT:
-            strength += 1
-            factors.append("RSI signal")
+            rsi_level = 1
+        else:
+            rsi_level = 0
         
-        # OI фактор (max 2 звезды)
         if oi_change_percent >= 5.0:  # Очень сильный рост OI
-            strength += 2
-            factors.append("strong OI growth")
+            oi_level = 2
         elif oi_change_percent >= self.min_oi_change_percent:
-            strength += 1
-            factors.append("OI growth")
-        
-        # Volume фактор (max 1 звезда)
-        if volume_ratio >= 2.0:  # Объём в 2+ раза выше среднего
-            strength += 1
-            factors.append("high volume")
-        
-        # Trend фактор (бонус/штраф)
-        if trend_confirmed:
-            strength += 0  # Нейтрально, это базовое требование
+            oi_level = 1
         else:
-            strength = max(0, strength - 1)  # Штраф за неподтверждённый тренд
-            factors.append("weak trend")
+            oi_level = 0
         
-        strength = min(5, max(1, strength))  # Ограничиваем от 1 до 5
-        description = " + ".join(factors) if factors else "basic signal"
+        high_volume = volume_ratio >= 2.0  # Объём в 2+ раза выше среднего
         
-        return strength, description
+        return _signal_strength(rsi_level, oi_level, bool(high_volume), bool(trend_confirmed))
 
-    def format_signal_message(self, signal_type, symbol, klines_df, rsi, atr, 
+    def format_signal_message(self, signal_type, symbol, last_close_price, rsi, atr, 
                             oi_change_percent, stop_loss, take_profit, 
                             volume_ratio, vol_info, signal_strength, strength_desc):
         """
         Форматирует сообщение с торговым сигналом
         """
-        last_close_price = klines_df['close'].iloc[-1]
         risk = abs(last_close_price - stop_loss)
         reward = abs(take_profit - last_close_price)
         risk_reward_ratio = reward / risk if risk > 0 else 0
@@ -220,18 +316,18 @@ class Strategy:
             f"• Volume: `{volume_ratio:.1f}x` above avg\n"
             f"• Volatility: `{vol_info}`\n\n"
             f"🎯 *Signal Strength:* {strength_desc}\n"
-            f"⏰ `{pd.Timestamp.now().strftime('%H:%M:%S')}`"
+            f"⏰ `{time.strftime('%H:%M:%S')}`"
         )
         
         return signal_message
 
-    def process_kline_data(self, symbol: str, klines_df: pd.DataFrame, current_oi: float, prev_oi: float):
+    def process_kline_data(self, symbol: str, klines, current_oi: float, prev_oi: float):
         """
         Обрабатывает данные свечей и открытого интереса для генерации сигнала.
         
         Args:
             symbol (str): Символ монеты (например, "BTCUSDT")
-            klines_df (pd.DataFrame): DataFrame с историческими данными свечей
+            klines (KlineWindow): Окно свечей из кольцевого буфера (массивы NumPy)
             current_oi (float): Текущее значение открытого интереса
             prev_oi (float): Предыдущее значение открытого интереса
             
@@ -239,53 +335,61 @@ class Strategy:
             str: Строка с сигналом или None, если сигнала нет.
         """
         # Проверяем достаточность данных
-        required_data_length = max(RSI_PERIOD + 1, ATR_PERIOD + 1)
-        if klines_df.empty or len(klines_df) < required_data_length:
-            logger.debug(f"Insufficient data for {symbol}: {len(klines_df)} candles")
+        close = klines.close
+        if len(close) < REQUIRED_DATA_LENGTH:
+            logger.debug("Insufficient data for %s: %d candles", symbol, len(close))
             return None
-
-        # Сбрасываем индекс для правильной работы с данными
-        klines_df = klines_df.reset_index(drop=True)
+        high = klines.high
+        low = klines.low
 
         # Рассчитываем технические индикаторы
         try:
-            rsi = calculate_rsi(klines_df['close'], RSI_PERIOD)
-            atr = calculate_atr(klines_df['high'], klines_df['low'], klines_df['close'], ATR_PERIOD)
+            rsi, atr = self.update_indicators(symbol, klines)
         except Exception as e:
             logger.error(f"Error calculating indicators for {symbol}: {e}")
             return None
 
         # Проверяем валидность индикаторов
-        if pd.isna(rsi) or pd.isna(atr) or atr == 0:
-            logger.debug(f"Invalid indicators for {symbol}. RSI: {rsi}, ATR: {atr}")
+        if math.isnan(rsi) or math.isnan(atr) or atr == 0:
+            logger.debug("Invalid indicators for %s. RSI: %s, ATR: %s", symbol, rsi, atr)
+            return None
+
+        # RSI в нейтральной зоне отсекает подавляющее большинство свечей,
+        # поэтому остальные фильтры считаем только после него
+        if RSI_OVERSOLD <= rsi <= RSI_OVERBOUGHT:
+            logger.debug("%s | RSI: %.2f in neutral zone", symbol, rsi)
             return None
 
         # Получаем текущую цену
-        last_close_price = klines_df['close'].iloc[-1]
+        last_close_price = close[-1]
         
         # Рассчитываем изменение открытого интереса
         oi_change_percent = self.calculate_oi_change_percent(current_oi, prev_oi)
-        oi_grew_significantly = oi_change_percent >= self.min_oi_change_percent
+        if oi_change_percent < self.min_oi_change_percent:
+            logger.debug("%s | RSI: %.2f | OI: %+.2f%% too small", symbol, rsi, oi_change_percent)
+            return None
 
         # Дополнительные фильтры
-        strong_volume, volume_ratio = self.is_strong_volume(klines_df)
+        strong_volume, volume_ratio = self.is_strong_volume(klines.volume)
         
         # Логируем текущее состояние
         logger.debug(
-            f"{symbol} | Price: {last_close_price:.4f} | "
-            f"RSI: {rsi:.2f} | ATR: {atr:.6f} | "
-            f"OI: {oi_change_percent:+.2f}% | Vol: {volume_ratio:.2f}x"
+            "%s | Price: %.4f | RSI: %.2f | ATR: %.6f | OI: %+.2f%% | Vol: %.2fx",
+            symbol, last_close_price, rsi, atr, oi_change_percent, volume_ratio
         )
+        
+        if not strong_volume:
+            return None
 
         signal_message = None
         
         # Проверяем условия для LONG сигнала
-        if rsi < RSI_OVERSOLD and oi_grew_significantly and strong_volume:
-            trend_confirmed, trend_desc = self.is_trend_confirmation(klines_df, 'LONG')
+        if rsi < RSI_OVERSOLD:
+            trend_confirmed, trend_desc = self.is_trend_confirmation(close, high, low, 'LONG')
             
             if trend_confirmed:
                 # Рассчитываем динамические уровни
-                stop_multiplier, take_multiplier, vol_info = self.calculate_dynamic_levels(klines_df, atr)
+                stop_multiplier, take_multiplier, vol_info = self.calculate_dynamic_levels(high, low, close, atr)
                 
                 stop_loss = last_close_price - (stop_multiplier * atr)
                 take_profit = last_close_price + (take_multiplier * atr)
@@ -296,7 +400,7 @@ class Strategy:
                 )
                 
                 signal_message = self.format_signal_message(
-                    "LONG", symbol, klines_df, rsi, atr, oi_change_percent,
+                    "LONG", symbol, last_close_price, rsi, atr, oi_change_percent,
                     stop_loss, take_profit, volume_ratio, vol_info,
                     signal_strength, strength_desc
                 )
@@ -304,12 +408,12 @@ class Strategy:
                 logger.info(f"LONG signal generated for {symbol} (strength: {signal_strength}/5)")
             
         # Проверяем условия для SHORT сигнала
-        elif rsi > RSI_OVERBOUGHT and oi_grew_significantly and strong_volume:
-            trend_confirmed, trend_desc = self.is_trend_confirmation(klines_df, 'SHORT')
+        else:  # rsi > RSI_OVERBOUGHT
+            trend_confirmed, trend_desc = self.is_trend_confirmation(close, high, low, 'SHORT')
             
             if trend_confirmed:
                 # Рассчитываем динамические уровни
-                stop_multiplier, take_multiplier, vol_info = self.calculate_dynamic_levels(klines_df, atr)
+                stop_multiplier, take_multiplier, vol_info = self.calculate_dynamic_levels(high, low, close, atr)
                 
                 stop_loss = last_close_price + (stop_multiplier * atr)
                 take_profit = last_close_price - (take_multiplier * atr)
@@ -320,7 +424,7 @@ class Strategy:
                 )
                 
                 signal_message = self.format_signal_message(
-                    "SHORT", symbol, klines_df, rsi, atr, oi_change_percent,
+                    "SHORT", symbol, last_close_price, rsi, atr, oi_change_percent,
                     stop_loss, take_profit, volume_ratio, vol_info,
                     signal_strength, strength_desc
                 )
@@ -1,25 +1,160 @@
-import telegram
 import logging
 import asyncio
-from datetime import datetime
-from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+import functools
+import re
+import time
+import aiohttp
+from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, HEARTBEAT_INTERVAL
 
 logger = logging.getLogger(__name__)
 
+TELEGRAM_API_URL = "https://api.telegram.org"
+MESSAGE_QUEUE_SIZE = 1000  # Max queued outbound messages before new ones are dropped
+MESSAGE_BATCH_DELAY = 0.05  # seconds - wait for more messages before sending a batch
+MESSAGE_BATCH_MAX_LENGTH = 3500  # Telegram allows 4096 chars, leave room for MarkdownV2 escaping
+MESSAGE_FLUSH_TIMEOUT = 10  # seconds - max wait for queued messages on shutdown
+# Outlive the gap between heartbeats so the warmed-up TLS connection is reused instead of re-handshaking
+SESSION_KEEPALIVE_TIMEOUT = HEARTBEAT_INTERVAL + 60  # seconds
+
+# Characters that need to be escaped in MarkdownV2
+MARKDOWN_V2_SPECIAL_CHARS = '_*[]()~`>#+-=|{}.!'
+
+# Every line of a message: group 1 is the inner text of a bold line (*...*), group 2 any other line
+_MESSAGE_LINE = re.compile(r'^(?:\*(.+)\*|(.*))$', re.MULTILINE)
+
+
+@functools.lru_cache(maxsize=None)
+def _escape_table(skip_chars=frozenset()):
+    """Build (once per skip set) a str.translate table escaping MarkdownV2 special characters"""
+    return str.maketrans({char: f'\\{char}' for char in MARKDOWN_V2_SPECIAL_CHARS if char not in skip_chars})
+
+
 class TelegramBotHandler:
     def __init__(self):
         """Initialize Telegram bot handler"""
-        try:
-            self.bot = telegram.Bot(token=TELEGRAM_BOT_TOKEN)
-            self.chat_id = TELEGRAM_CHAT_ID
-            self.message_queue = asyncio.Queue()
-            self.is_processing = False
+        self.message_queue = asyncio.Queue(maxsize=MESSAGE_QUEUE_SIZE)
+        self._sender_task = None
+        self._unsent = 0  # Queued or in-flight messages not yet handed to Telegram
+        self._session = None  # Created on first request, inside the running event loop
+        self.bot_info = None  # getMe result, cached by test_connection
+        self.chat_id = TELEGRAM_CHAT_ID
+        if TELEGRAM_BOT_TOKEN:
+            # Raw Bot API over one keep-alive aiohttp session: the bot only sends messages
+            self.api_url = f"{TELEGRAM_API_URL}/bot{TELEGRAM_BOT_TOKEN}"
             logger.info("Telegram bot initialized successfully")
+        else:
+            logger.error("Error initializing Telegram bot: TELEGRAM_BOT_TOKEN is not set")
+            self.api_url = None
+
+    def _get_session(self):
+        """Return the shared HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=4, keepalive_timeout=SESSION_KEEPALIVE_TIMEOUT),
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+        return self._session
+
+    async def _api_request(self, method, payload=None):
+        """
+        Call a Bot API method
+        
+        Args:
+            method (str): Bot API method name, e.g. 'sendMessage'
+            payload (dict): JSON parameters
+            
+        Returns:
+            tuple: (int, dict) - HTTP status and decoded response
+        """
+        async with self._get_session().post(f"{self.api_url}/{method}", json=payload) as response:
+            return response.status, await response.json(content_type=None)
+
+    async def send_message(self, text, parse_mode='MarkdownV2'):
+        """
+        Queue a message for the background sender
+        
+        Waits only if the queue is full; delivery, escaping and retries happen in the sender.
+        Messages queued close together are joined into one Telegram message.
+        
+        Args:
+            text (str): Message text
+            parse_mode (str): Parse mode for formatting
+            
+        Returns:
+            bool: True if the message was queued
+        """
+        if not self.api_url:
+            logger.error("Telegram bot not initialized. Message not sent.")
+            return False
+
+        self._ensure_sender()
+        await self.message_queue.put((text, parse_mode))
+        self._unsent += 1
+        return True
+
+    def enqueue_message(self, text, parse_mode='MarkdownV2'):
+        """
+        Queue a message for the background sender and return immediately
+        
+        Unlike send_message, never waits: the message is dropped if the queue is full.
+        
+        Args:
+            text (str): Message text
+            parse_mode (str): Parse mode for formatting
+        """
+        if not self.api_url:
+            logger.error("Telegram bot not initialized. Message not sent.")
+            return
+
+        self._ensure_sender()
+        try:
+            self.message_queue.put_nowait((text, parse_mode))
+        except asyncio.QueueFull:
+            logger.warning("Telegram message queue is full, message dropped")
+        else:
+            self._unsent += 1
+
+    def _ensure_sender(self):
+        """Start the background sender task if it is not running"""
+        if self._sender_task is None or self._sender_task.done():
+            self._sender_task = asyncio.create_task(self._sender_loop())
+
+    async def _sender_loop(self):
+        """Drain the message queue, coalescing queued messages up to MESSAGE_BATCH_MAX_LENGTH"""
+        while True:
+            text, parse_mode = await self.message_queue.get()
+            await asyncio.sleep(MESSAGE_BATCH_DELAY)  # Let a burst of messages accumulate
+            
+            batch = []
+            batch_mode = parse_mode
+            length = 0
+            while True:
+                if batch and (parse_mode != batch_mode or length + len(text) > MESSAGE_BATCH_MAX_LENGTH):
+                    await self._send_batch(batch, batch_mode)
+                    batch = []
+                    batch_mode = parse_mode
+                    length = 0
+                batch.append(text)
+                length += len(text) + 2
+                
+                if self.message_queue.empty():
+                    break
+                text, parse_mode = self.message_queue.get_nowait()
+            
+            await self._send_batch(batch, batch_mode)
+
+    async def _send_batch(self, batch, parse_mode):
+        """Send queued messages as one Telegram message"""
+        try:
+            await self._deliver('\n\n'.join(batch), parse_mode)
         except Exception as e:
-            logger.error(f"Error initializing Telegram bot: {e}")
-            self.bot = None
+            logger.error(f"Error sending queued messages: {e}")
+        finally:
+            self._unsent -= len(batch)
+            for _ in batch:
+                self.message_queue.task_done()
 
-    async def send_message(self, text, parse_mode='MarkdownV2', max_retries=3):
+    async def _deliver(self, text, parse_mode='MarkdownV2', max_retries=3):
         """
         Send message to Telegram with retry logic and rate limiting
         
@@ -28,36 +163,38 @@ class TelegramBotHandler:
             parse_mode (str): Parse mode for formatting
             max_retries (int): Maximum number of retry attempts
         """
-        if not self.bot:
-            logger.error("Telegram bot not initialized. Message not sent.")
-            return False
+        # Escape special characters for MarkdownV2 (once for the whole batch)
+        payload_text = self._escape_markdown_v2(text) if parse_mode == 'MarkdownV2' else text
 
-        # Escape special characters for MarkdownV2
-        if parse_mode == 'MarkdownV2':
-            text = self._escape_markdown_v2(text)
+        payload = {
+            'chat_id': self.chat_id,
+            'text': payload_text,
+            'disable_web_page_preview': True
+        }
+        if parse_mode:
+            payload['parse_mode'] = parse_mode
 
         for attempt in range(max_retries):
             try:
-                await self.bot.send_message(
-                    chat_id=self.chat_id,
-                    text=text,
-                    parse_mode=parse_mode,
-                    disable_web_page_preview=True
-                )
-                logger.info(f"Message sent to Telegram successfully")
-                return True
+                status, response = await self._api_request('sendMessage', payload)
+                if response.get('ok'):
+                    logger.info(f"Message sent to Telegram successfully")
+                    return True
+                
+                if status == 429:
+                    wait_time = response.get('parameters', {}).get('retry_after', 1)
+                    logger.warning(f"Rate limited. Waiting {wait_time} seconds...")
+                    await asyncio.sleep(wait_time)
+                    continue
                 
-            except telegram.error.RetryAfter as e:
-                wait_time = e.retry_after
-                logger.warning(f"Rate limited. Waiting {wait_time} seconds...")
-                await asyncio.sleep(wait_time)
+                if status == 400:
+                    logger.error(f"Bad request error: {response.get('description')}")
+                    # Try without markdown if formatting fails, resending the unescaped text
+                    if parse_mode == 'MarkdownV2' and attempt == 0:
+                        return await self._deliver(text, parse_mode=None, max_retries=max_retries-1)
+                    break
                 
-            except telegram.error.BadRequest as e:
-                logger.error(f"Bad request error: {e}")
-                # Try without markdown if formatting fails
-                if parse_mode == 'MarkdownV2' and attempt == 0:
-                    return await self.send_message(text, parse_mode=None, max_retries=max_retries-1)
-                break
+                raise RuntimeError(response.get('description', f"HTTP {status}"))
                 
             except Exception as e:
                 logger.error(f"Error sending message (attempt {attempt + 1}): {e}")
@@ -67,6 +204,28 @@ class TelegramBotHandler:
         logger.error(f"Failed to send message after {max_retries} attempts")
         return False
 
+    async def close(self):
+        """Send everything still queued, stop the background sender and close the HTTP session"""
+        if self._sender_task is not None:
+            if not self._sender_task.done():
+                try:
+                    await asyncio.wait_for(self.message_queue.join(), timeout=MESSAGE_FLUSH_TIMEOUT)
+                except asyncio.TimeoutError:
+                    logger.warning(
+                        "Telegram flush timed out after %ss, %d queued messages not sent",
+                        MESSAGE_FLUSH_TIMEOUT, self._unsent
+                    )
+            self._sender_task.cancel()
+            try:
+                await self._sender_task
+            except asyncio.CancelledError:
+                pass
+            self._sender_task = None
+        
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
     def _escape_markdown_v2(self, text):
         """
         Escape special characters for Telegram's MarkdownV2
@@ -77,25 +236,18 @@ class TelegramBotHandler:
         Returns:
             str: Escaped text
         """
-        # Characters that need to be escaped in MarkdownV2
-        escape_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
-        
-        # Don't escape characters that are part of intended formatting
-        lines = text.split('\n')
-        escaped_lines = []
-        
-        for line in lines:
-            # Check if line contains intended formatting (starts with * for bold)
-            if line.startswith('*') and line.endswith('*') and len(line) > 2:
-                # This is a bold line, don't escape the asterisks
-                inner_text = line[1:-1]  # Remove outer asterisks
-                escaped_inner = self._escape_text(inner_text, ['*'])  # Escape everything except *
-                escaped_lines.append(f"*{escaped_inner}*")
-            else:
-                # Regular line, escape everything
-                escaped_lines.append(self._escape_text(line, []))
-        
-        return '\n'.join(escaped_lines)
+        # Don't escape characters that are part of intended formatting;
+        # a single regex pass over the message replaces the split/join line loop
+        return _MESSAGE_LINE.sub(self._escape_line, text)
+
+    def _escape_line(self, match):
+        """Escape one message line matched by _MESSAGE_LINE"""
+        bold_text = match.group(1)
+        if bold_text is not None:
+            # This is a bold line, don't escape the asterisks
+            return f"*{self._escape_text(bold_text, ['*'])}*"
+        # Regular line, escape everything
+        return self._escape_text(match.group(2))
 
     def _escape_text(self, text, skip_chars=None):
         """
@@ -108,16 +260,8 @@ class TelegramBotHandler:
         Returns:
             str: Escaped text
         """
-        if skip_chars is None:
-            skip_chars = []
-            
-        escape_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
-        
-        for char in escape_chars:
-            if char not in skip_chars:
-                text = text.replace(char, f'\\{char}')
-                
-        return text
+        # One C-level pass with a cached translation table instead of a replace() per character
+        return text.translate(_escape_table(frozenset(skip_chars or ())))
 
     async def send_status_update(self, active_symbols, reconnects, uptime):
         """
@@ -133,7 +277,7 @@ class TelegramBotHandler:
             f"Active Symbols: {active_symbols}\n"
             f"Reconnects: {reconnects}\n"
             f"Uptime: {uptime}\n"
-            f"Time: {datetime.now().strftime('%H:%M:%S')}"
+            f"Time: {time.strftime('%H:%M:%S')}"
         )
         await self.send_message(status_msg)
 
@@ -162,7 +306,7 @@ class TelegramBotHandler:
             f"Open Interest: {oi_info}\n\n"
             f"🛑 Stop Loss: {stop_loss:.4f}\n"
             f"🎯 Take Profit: {take_profit:.4f}\n\n"
-            f"Time: {datetime.now().strftime('%H:%M:%S')}"
+            f"Time: {time.strftime('%H:%M:%S')}"
         )
         await self.send_message(signal_msg)
 
@@ -177,7 +321,7 @@ class TelegramBotHandler:
         alert_msg = (
             f"🚨 *{error_type}*\n\n"
             f"{error_msg}\n\n"
-            f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            f"Time: {time.strftime('%Y-%m-%d %H:%M:%S')}"
         )
         await self.send_message(alert_msg)
 
@@ -185,12 +329,21 @@ class TelegramBotHandler:
         """
         Test Telegram bot connection
         
+        The getMe result is cached, and the call opens the shared keep-alive
+        connection, so the first real message does not pay the TLS handshake.
+        
         Returns:
             bool: True if connection successful
         """
+        if self.bot_info is not None:
+            return True
+        
         try:
-            await self.bot.get_me()
-            logger.info("Telegram bot connection test successful")
+            status, response = await self._api_request('getMe')
+            if not response.get('ok'):
+                raise RuntimeError(response.get('description', f"HTTP {status}"))
+            self.bot_info = response.get('result', {})
+            logger.info("Telegram bot connection test successful (@%s)", self.bot_info.get('username'))
             return True
         except Exception as e:
             logger.error(f"Telegram bot connection test failed: {e}")
@@ -1,29 +1,57 @@
-import pandas as pd
 import numpy as np
 
-def calculate_rsi(prices: pd.Series, period: int = 14) -> float:
-    """Рассчитывает RSI для последней цены в серии."""
-    if len(prices) < period + 1:
-        return np.nan  # Недостаточно данных
-    delta = prices.diff().astype(float)
-    gain = delta.where(delta > 0, 0.0)
-    loss = -delta.where(delta < 0, 0.0)
-    avg_gain = gain.ewm(com=period - 1, min_periods=period).mean()
-    avg_loss = loss.ewm(com=period - 1, min_periods=period).mean()
-    if avg_loss.iloc[-1] == 0:
-        return 100.0 if avg_gain.iloc[-1] > 0 else 50.0
-    rs = avg_gain.iloc[-1] / avg_loss.iloc[-1]
-    rsi = 100.0 - (100.0 / (1.0 + rs))
-    return rsi
+try:
+    from numba import njit
+except ImportError:  # numba опционален: без него ядра ниже работают как обычный Python
+    def njit(*args, **kwargs):
+        """Заглушка для numba.njit, возвращающая функцию без изменений."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
 
-def calculate_atr(high_prices: pd.Series, low_prices: pd.Series, close_prices: pd.Series, period: int = 14) -> float:
-    """Рассчитывает ATR для последней свечи."""
-    if len(high_prices) < period or len(low_prices) < period or len(close_prices) < period:
-        return np.nan
-    prev_close = close_prices.shift(1)
-    tr1 = high_prices - low_prices
-    tr2 = abs(high_prices - prev_close)
-    tr3 = abs(low_prices - prev_close)
-    true_range = pd.DataFrame({'tr1': tr1, 'tr2': tr2, 'tr3': tr3}).max(axis=1)
-    atr = true_range.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
-    return atr.iloc[-1]
\ No newline at end of file
+# Инкрементальные версии индикаторов: сглаживание Уайлдера avg = (avg * (period - 1) + x) / period.
+# Средние прирост/падение, посеянные нулём с первой свечи, дают тот же RSI, что и pandas
+# ewm(com=period - 1) (нормировка ewm сокращается в отношении), а ATR совпадает
+# с ewm(alpha=1/period, adjust=False) по true range.
+# Вклад значения n свечей назад убывает как (1 - 1/period) ** n, поэтому для посева хватает
+# хвоста в 5 * period свечей: отброшенная история весит не больше ~0.6% при периоде 14.
+
+@njit(cache=True)
+def rsi_update(avg_gain: float, avg_loss: float, prev_close: float, close: float, period: int):
+    """Сдвигает средние прирост/падение RSI на одну новую свечу."""
+    delta = close - prev_close
+    gain = delta if delta > 0 else 0.0
+    loss = -delta if delta < 0 else 0.0
+    avg_gain = (avg_gain * (period - 1) + gain) / period
+    avg_loss = (avg_loss * (period - 1) + loss) / period
+    return avg_gain, avg_loss
+
+@njit(cache=True)
+def atr_update(atr: float, high: float, low: float, prev_close: float, period: int) -> float:
+    """Сдвигает ATR на одну новую свечу."""
+    true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+    return (atr * (period - 1) + true_range) / period
+
+@njit(cache=True)
+def rsi_averages(close: np.ndarray, period: int):
+    """Считает средние прирост/падение RSI по всей серии (для посева состояния)."""
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, close.shape[0]):
+        avg_gain, avg_loss = rsi_update(avg_gain, avg_loss, close[i - 1], close[i], period)
+    return avg_gain, avg_loss
+
+@njit(cache=True)
+def atr_wilder(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> float:
+    """Считает ATR по всей серии (для посева состояния)."""
+    atr = high[0] - low[0]
+    for i in range(1, close.shape[0]):
+        atr = atr_update(atr, high[i], low[i], close[i - 1], period)
+    return atr
+
+def rsi_from_averages(avg_gain: float, avg_loss: float) -> float:
+    """Переводит средние прирост/падение в значение RSI."""
+    if avg_loss == 0:
+        return 100.0 if avg_gain > 0 else 50.0
+    rs = avg_gain / avg_loss
+    return 100.0 - (100.0 / (1.0 + rs))
\ No newline at end of file